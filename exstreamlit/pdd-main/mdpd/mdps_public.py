@@ -5,6 +5,12 @@ from streamlit_option_menu import option_menu
 import re
 import sqlite3
 import pandas as pd
+import json
+import math
+import threading
+import time
+import logging
+import os
 
 # Initialize the SQLite database
 def init_db():
@@ -16,15 +22,93 @@ def init_db():
         email TEXT UNIQUE,
         password TEXT
     )''')
+    # One row per (model, feature, profile); profile is 'reference' or the UTC day
+    # (YYYY-MM-DD) of a drift window
+    c.execute('''CREATE TABLE IF NOT EXISTS drift_profiles (
+        model TEXT,
+        feature TEXT,
+        profile TEXT,
+        counts TEXT,
+        n INTEGER,
+        total REAL,
+        min_value REAL,
+        max_value REAL,
+        updated_at REAL,
+        PRIMARY KEY (model, feature, profile)
+    )''')
+    # Unwindowed profile written before drift windows were introduced
+    c.execute("DELETE FROM drift_profiles WHERE profile = 'current'")
+    # Append-only event log; only read by rebuild_rollups()
+    c.execute('''CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event TEXT,
+        disease TEXT,
+        positive INTEGER,
+        created_at TEXT
+    )''')
+    # Daily counts per (event, disease), kept in step with events by write_event()
+    c.execute('''CREATE TABLE IF NOT EXISTS daily_rollups (
+        day TEXT,
+        event TEXT,
+        disease TEXT,
+        count INTEGER,
+        positives INTEGER,
+        PRIMARY KEY (day, event, disease)
+    )''')
     conn.commit()
     conn.close()
 
+# Log an event and bump its daily rollup using the caller's transaction
+def write_event(c, event, disease="", positive=0):
+    now = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+    c.execute("INSERT INTO events (event, disease, positive, created_at) VALUES (?, ?, ?, ?)",
+              (event, disease, positive, now))
+    c.execute('''INSERT INTO daily_rollups (day, event, disease, count, positives) VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT(day, event, disease) DO UPDATE SET count = count + 1, positives = positives + excluded.positives''',
+              (now[:10], event, disease, positive))
+
+# Log a standalone event (login, prediction); failures are only logged so
+# analytics can never break the page that triggered them
+def record_event(event, disease="", positive=0):
+    try:
+        conn = sqlite3.connect("users.db")
+        try:
+            write_event(conn.cursor(), event, disease, positive)
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        logging.exception("Failed to record %s event", event)
+
+# Rebuild all rollups from the event log in one bulk pass
+def rebuild_rollups():
+    conn = sqlite3.connect("users.db")
+    c = conn.cursor()
+    c.execute("DELETE FROM daily_rollups")
+    c.execute('''INSERT INTO daily_rollups (day, event, disease, count, positives)
+        SELECT substr(created_at, 1, 10), event, disease, COUNT(*), SUM(positive)
+        FROM events GROUP BY substr(created_at, 1, 10), event, disease''')
+    conn.commit()
+    conn.close()
+
+# Read the rollups for the last `days` days (UTC)
+def load_rollups(days):
+    conn = sqlite3.connect("users.db")
+    since = time.strftime("%Y-%m-%d", time.gmtime(time.time() - (days - 1) * 86400))
+    df = pd.read_sql_query(
+        "SELECT day, event, disease, count, positives FROM daily_rollups WHERE day >= ? ORDER BY day",
+        conn, params=(since,)
+    )
+    conn.close()
+    return df
+
 # Add a new user
 def add_user(name, email, password):
     conn = sqlite3.connect("users.db")
     c = conn.cursor()
     try:
         c.execute("INSERT INTO users (name, email, password) VALUES (?, ?, ?)", (name, email, password))
+        write_event(c, "signup")
         conn.commit()
         return True
     except sqlite3.IntegrityError:
@@ -41,6 +125,246 @@ def authenticate_user(email, password):
     conn.close()
     return user is not None
 
+# Expected value range (low, high) of every model input, in the order passed to predict()
+DRIFT_FEATURES = {
+    "diabetes_model": [
+        ("Pregnancies", 0, 20), ("Glucose", 0, 200), ("BloodPressure", 0, 140),
+        ("SkinThickness", 0, 100), ("Insulin", 0, 900), ("BMI", 0, 70),
+        ("DiabetesPedigreeFunction", 0, 2.5), ("Age", 0, 100),
+    ],
+    "heart_disease_model": [
+        ("age", 0, 100), ("sex", 0, 1), ("cp", 0, 3), ("trestbps", 80, 220),
+        ("chol", 100, 600), ("fbs", 0, 1), ("restecg", 0, 2), ("thalach", 50, 220),
+        ("exang", 0, 1), ("oldpeak", 0, 6.5), ("slope", 0, 2), ("ca", 0, 4), ("thal", 0, 3),
+    ],
+    "parkinsons_model": [
+        ("MDVP:Fo(Hz)", 80, 270), ("MDVP:Fhi(Hz)", 100, 600), ("MDVP:Flo(Hz)", 60, 240),
+        ("MDVP:Jitter(%)", 0, 0.035), ("MDVP:Jitter(Abs)", 0, 0.00026), ("MDVP:RAP", 0, 0.022),
+        ("MDVP:PPQ", 0, 0.02), ("Jitter:DDP", 0, 0.065), ("MDVP:Shimmer", 0, 0.12),
+        ("MDVP:Shimmer(dB)", 0, 1.3), ("Shimmer:APQ3", 0, 0.06), ("Shimmer:APQ5", 0, 0.08),
+        ("MDVP:APQ", 0, 0.14), ("Shimmer:DDA", 0, 0.17), ("NHR", 0, 0.32), ("HNR", 8, 34),
+        ("RPDE", 0.25, 0.69), ("DFA", 0.57, 0.83), ("spread1", -8, -2.4), ("spread2", 0, 0.45),
+        ("D2", 1.4, 3.7), ("PPE", 0, 0.53),
+    ],
+}
+DRIFT_BINS = 20  # equal-width bins per feature, plus one underflow and one overflow bin
+DRIFT_SNAPSHOT_EVERY = 50  # persist after this many predictions...
+DRIFT_SNAPSHOT_SECONDS = 300  # ...or after this many seconds, whichever comes first
+DRIFT_WINDOWS_KEPT = 30  # daily windows kept for the drift-over-time view
+# Integer-coded inputs whose quantiles must be one of the codes, not an interpolated value
+DRIFT_DISCRETE = {"Pregnancies", "sex", "cp", "fbs", "restecg", "exang", "slope", "ca", "thal"}
+
+# Empty fixed-size sketch for one feature
+def new_sketch():
+    return {"counts": [0] * (DRIFT_BINS + 2), "n": 0, "total": 0.0, "min": None, "max": None}
+
+# Histogram bin of a value: 0 is underflow, DRIFT_BINS + 1 is overflow
+def sketch_bin(value, low, high):
+    if value < low:
+        return 0
+    if value > high:
+        return DRIFT_BINS + 1
+    return 1 + min(int((value - low) / (high - low) * DRIFT_BINS), DRIFT_BINS - 1)
+
+# Add one value to a sketch in O(1)
+def update_sketch(sketch, value, low, high):
+    sketch["counts"][sketch_bin(value, low, high)] += 1
+    sketch["n"] += 1
+    sketch["total"] += value
+    sketch["min"] = value if sketch["min"] is None else min(sketch["min"], value)
+    sketch["max"] = value if sketch["max"] is None else max(sketch["max"], value)
+
+# Estimate a quantile from the histogram, limited to the values actually seen.
+# Continuous features interpolate inside the matching bin; discrete ones return
+# the smallest integer that falls into it.
+def sketch_quantile(sketch, q, low, high, discrete=False):
+    if sketch["n"] == 0:
+        return None
+    width = (high - low) / DRIFT_BINS
+    target = q * sketch["n"]
+    seen = 0
+    for index, count in enumerate(sketch["counts"]):
+        if count and seen + count >= target:
+            if index == 0:
+                return sketch["min"]
+            if index == DRIFT_BINS + 1:
+                return sketch["max"]
+            edge = low + (index - 1) * width
+            estimate = edge + (target - seen) / count * width
+            if discrete:
+                estimate = edge
+                for value in range(math.floor(edge), math.ceil(edge + width) + 1):
+                    if sketch_bin(value, low, high) == index:
+                        estimate = value
+                        break
+            return min(max(estimate, sketch["min"]), sketch["max"])
+        seen += count
+    return sketch["max"]
+
+# Population Stability Index between a reference and a current histogram
+def population_stability_index(reference, current):
+    if reference["n"] == 0 or current["n"] == 0:
+        return None
+    score = 0.0
+    for ref_count, cur_count in zip(reference["counts"], current["counts"]):
+        ref_share = max(ref_count / reference["n"], 1e-4)
+        cur_share = max(cur_count / current["n"], 1e-4)
+        score += (cur_share - ref_share) * math.log(cur_share / ref_share)
+    return score
+
+# Drift window (UTC day) a timestamp falls into, defaulting to now
+def drift_window(timestamp=None):
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+# Oldest drift window still kept
+def oldest_drift_window():
+    return drift_window(time.time() - (DRIFT_WINDOWS_KEPT - 1) * 86400)
+
+# Sketch from a stored row, or None if it was written with a different bin layout
+def stored_sketch(counts, n, total, min_value, max_value):
+    counts = json.loads(counts)
+    if len(counts) != DRIFT_BINS + 2:
+        return None
+    return {"counts": counts, "n": n, "total": total, "min": min_value, "max": max_value}
+
+# Read all stored sketches of one profile ('reference' or a drift window)
+def load_drift_profile(profile):
+    conn = sqlite3.connect("users.db")
+    c = conn.cursor()
+    c.execute("SELECT model, feature, counts, n, total, min_value, max_value FROM drift_profiles WHERE profile = ?", (profile,))
+    rows = c.fetchall()
+    conn.close()
+    sketches = {}
+    for model, feature, *row in rows:
+        sketch = stored_sketch(*row)
+        if sketch:
+            sketches.setdefault(model, {})[feature] = sketch
+    return sketches
+
+# Read the kept drift windows of one model as {window: {feature: sketch}}
+def load_drift_history(model):
+    conn = sqlite3.connect("users.db")
+    c = conn.cursor()
+    c.execute(
+        "SELECT profile, feature, counts, n, total, min_value, max_value FROM drift_profiles "
+        "WHERE model = ? AND profile != 'reference' AND profile >= ?",
+        (model, oldest_drift_window()),
+    )
+    rows = c.fetchall()
+    conn.close()
+    history = {}
+    for window, feature, *row in rows:
+        sketch = stored_sketch(*row)
+        if sketch:
+            history.setdefault(window, {})[feature] = sketch
+    return history
+
+# Drop drift windows that have aged out
+def prune_drift_windows():
+    conn = sqlite3.connect("users.db")
+    c = conn.cursor()
+    c.execute("DELETE FROM drift_profiles WHERE profile != 'reference' AND profile < ?", (oldest_drift_window(),))
+    conn.commit()
+    conn.close()
+
+# Write sketches as one profile, replacing what was stored before
+def save_drift_profile(profile, sketches):
+    conn = sqlite3.connect("users.db")
+    c = conn.cursor()
+    now = time.time()
+    c.executemany(
+        "INSERT OR REPLACE INTO drift_profiles (model, feature, profile, counts, n, total, min_value, max_value, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (model, feature, profile, json.dumps(s["counts"]), s["n"], s["total"], s["min"], s["max"], now)
+            for model, features in sketches.items()
+            for feature, s in features.items()
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+# Empty sketches for every feature of every model
+def new_drift_sketches(stored=None):
+    stored = stored or {}
+    return {
+        model: {name: stored.get(model, {}).get(name, new_sketch()) for name, _, _ in features}
+        for model, features in DRIFT_FEATURES.items()
+    }
+
+# In-memory sketches of the current drift window, shared by every session and
+# resumed from the window's last stored snapshot
+@st.cache_resource
+def get_drift_monitor():
+    window = drift_window()
+    return {
+        "lock": threading.Lock(),  # guards window, sketches, pending and last_snapshot
+        "save_lock": threading.Lock(),  # serializes snapshot writes; taken before "lock"
+        "window": window,
+        "sketches": new_drift_sketches(load_drift_profile(window)),
+        "pending": 0,
+        "last_snapshot": time.time(),
+    }
+
+# Persist the live sketches under their drift window. Copy and write happen
+# under the save lock so an older copy can never overwrite a newer one; with
+# wait=False the call is skipped if another snapshot is already being written.
+def snapshot_drift_monitor(monitor, wait=True):
+    if not monitor["save_lock"].acquire(blocking=wait):
+        return None
+    try:
+        with monitor["lock"]:
+            window = monitor["window"]
+            snapshot = json.loads(json.dumps(monitor["sketches"]))
+            monitor["pending"] = 0
+            monitor["last_snapshot"] = time.time()
+        save_drift_profile(window, snapshot)
+        return snapshot
+    finally:
+        monitor["save_lock"].release()
+
+# Close the live window once the UTC day has changed: store its final sketches,
+# start empty ones for the new day and drop windows that have aged out
+def rotate_drift_window(monitor):
+    window = drift_window()
+    if monitor["window"] == window:
+        return
+    with monitor["save_lock"]:
+        with monitor["lock"]:
+            if monitor["window"] == window:
+                return
+            closed, sketches = monitor["window"], monitor["sketches"]
+            monitor["window"] = window
+            monitor["sketches"] = new_drift_sketches()
+            monitor["pending"] = 0
+            monitor["last_snapshot"] = time.time()
+        save_drift_profile(closed, sketches)
+        prune_drift_windows()
+
+# Record the inputs of one successful prediction; raw rows are never stored.
+# Failures are only logged so monitoring can never break a prediction.
+def record_prediction_inputs(model, inputs):
+    try:
+        values = [float(v) for v in inputs]
+    except (TypeError, ValueError):
+        return
+    try:
+        monitor = get_drift_monitor()
+        rotate_drift_window(monitor)
+        with monitor["lock"]:
+            sketches = monitor["sketches"][model]
+            for (name, low, high), value in zip(DRIFT_FEATURES[model], values):
+                update_sketch(sketches[name], value, low, high)
+            monitor["pending"] += 1
+            due = (
+                monitor["pending"] >= DRIFT_SNAPSHOT_EVERY
+                or time.time() - monitor["last_snapshot"] >= DRIFT_SNAPSHOT_SECONDS
+            )
+        if due:
+            snapshot_drift_monitor(monitor, wait=False)
+    except Exception:
+        logging.exception("Drift monitor update failed for %s", model)
+
 # Initialize the database
 init_db()
 
@@ -53,6 +377,29 @@ def validate_email(email):
     email = email.strip().lower()
     return re.match(r"[^@]+@[^@]+\.[^@]+", email) and email.endswith("@gmail.com")
 
+# Accounts allowed to open the Drift Monitor and Admin Analytics pages, read from
+# `admin_emails` in .streamlit/secrets.toml (a list or comma-separated string) or
+# the ADMIN_EMAILS environment variable. Nobody is an admin when neither is set.
+def load_admin_emails():
+    emails = None
+    # Touching st.secrets without a secrets file renders an error box on the page,
+    # so only read it once load_if_toml_exists() has quietly confirmed a file.
+    try:
+        if st.secrets.load_if_toml_exists():
+            emails = st.secrets.get("admin_emails")
+    except Exception:  # unreadable secrets.toml
+        logging.exception("Could not read admin_emails from secrets")
+    if not emails:
+        emails = os.environ.get("ADMIN_EMAILS", "")
+    if isinstance(emails, str):
+        emails = emails.split(",")
+    return {email.strip().lower() for email in emails if email.strip()}
+
+ADMIN_EMAILS = load_admin_emails()
+
+def is_admin():
+    return (st.session_state.user or "").strip().lower() in ADMIN_EMAILS
+
 # Initialize session state variables
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
@@ -75,17 +422,22 @@ with st.sidebar:
             default_index=0,
         )
     else:
+        pages = [
+            "Home",
+            "Diabetes Prediction",
+            "Heart Disease Prediction",
+            "Parkinson's Prediction",
+            "Feedback and Contact",
+            "Logout",
+        ]
+        icons = ["house", "activity", "heart", "person", "envelope", "box-arrow-right"]
+        if is_admin():
+            pages[-1:-1] = ["Drift Monitor", "Admin Analytics"]
+            icons[-1:-1] = ["graph-up", "bar-chart"]
         selected = option_menu(
             "Predictive Disease Detection App",
-            [
-                "Home",
-                "Diabetes Prediction",
-                "Heart Disease Prediction",
-                "Parkinson's Prediction",
-                "Feedback and Contact",
-                "Logout",
-            ],
-            icons=["house", "activity", "heart", "person", "envelope", "box-arrow-right"],
+            pages,
+            icons=icons,
             default_index=0,
         )
 
@@ -184,6 +536,7 @@ elif selected == "Login":
         if not validate_email(email):
             st.error("Please enter a valid Gmail address (e.g., example@gmail.com).")
         elif authenticate_user(email, password):
+            record_event("login")
             st.session_state.logged_in = True
             st.session_state.user = email
             st.session_state.name = email.split("@")[0]
@@ -374,6 +727,11 @@ if st.session_state.logged_in:
                 st.markdown(f"### Test Result: {result}")
                 # Set session state for showing the report
                 st.session_state.show_report = True
+                record_prediction_inputs(
+                    "diabetes_model",
+                    [Pregnancies, Glucose, BloodPressure, SkinThickness, Insulin, BMI, DiabetesPedigreeFunction, Age]
+                )
+                record_event("prediction", "Diabetes", int(result == "Positive"))
         if st.session_state.show_report:
             show_report = st.button("Click here to see Test Report")
             if show_report:
@@ -483,6 +841,8 @@ if st.session_state.logged_in:
             
                     # Show detailed information in a report
                     st.session_state.show_report = True
+                    record_prediction_inputs("heart_disease_model", inputs)
+                    record_event("prediction", "Heart Disease", int(heart_result == "Positive"))
             except Exception as e:
                 st.error(f"An error occurred during prediction: {e}")
 
@@ -636,6 +996,8 @@ if st.session_state.logged_in:
 
                     # Set the session state to show the report
                     st.session_state.show_report = True
+                    record_prediction_inputs("parkinsons_model", user_input)
+                    record_event("prediction", "Parkinson's", int(parkinsons_diagnosis == "Positive"))
 
             except Exception as e:
                 st.error(f"Error during prediction: {e}")
@@ -690,3 +1052,137 @@ if st.session_state.logged_in:
                     use_container_width=True
                 )
 
+
+    # Drift Monitor Page
+    elif selected == "Drift Monitor" and is_admin():
+        st.title("Input Drift Monitor")
+
+        model_names = {
+            "Diabetes": "diabetes_model",
+            "Heart Disease": "heart_disease_model",
+            "Parkinson's": "parkinsons_model",
+        }
+        model = model_names[st.selectbox("Model", list(model_names))]
+        monitor = get_drift_monitor()
+        rotate_drift_window(monitor)
+        live_window = monitor["window"]
+        history = load_drift_history(model)
+        windows = sorted(set(history) | {live_window}, reverse=True)
+        window = st.selectbox(
+            "Window (UTC day)", windows,
+            format_func=lambda w: f"{w} (current)" if w == live_window else w,
+        )
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("Save Snapshot Now"):
+                snapshot_drift_monitor(monitor)
+                st.success("Current window saved.")
+        with col2:
+            if st.button("Set Window as Reference"):
+                if window == live_window:
+                    sketches = snapshot_drift_monitor(monitor)[model]
+                else:
+                    sketches = history[window]
+                save_drift_profile("reference", {model: sketches})
+                st.success(f"Reference profile set from {window}.")
+        with col3:
+            if st.button("Reset Current Window"):
+                with monitor["lock"]:
+                    monitor["sketches"][model] = {name: new_sketch() for name, _, _ in DRIFT_FEATURES[model]}
+                snapshot_drift_monitor(monitor)
+                st.success("Current window cleared.")
+
+        # The live window is always newer than its last stored snapshot
+        with monitor["lock"]:
+            if monitor["window"] == live_window:
+                history[live_window] = json.loads(json.dumps(monitor["sketches"][model]))
+        reference = load_drift_profile("reference").get(model, {})
+        if not reference:
+            st.info("No reference profile stored yet. Use 'Set Window as Reference' once inputs look representative.")
+
+        def fmt(value):
+            return "-" if value is None else f"{value:.4g}"
+
+        selected_sketches = history.get(window, {})
+        rows = []
+        for name, low, high in DRIFT_FEATURES[model]:
+            cur = selected_sketches.get(name, new_sketch())
+            ref = reference.get(name, new_sketch())
+            psi = population_stability_index(ref, cur)
+            discrete = name in DRIFT_DISCRETE
+            if psi is None:
+                status = "No data"
+            elif psi < 0.1:
+                status = "Stable"
+            elif psi < 0.25:
+                status = "Moderate drift"
+            else:
+                status = "Drifted"
+            rows.append({
+                "Feature": name,
+                "Predictions": cur["n"],
+                "Mean": fmt(cur["total"] / cur["n"] if cur["n"] else None),
+                "Window p50": fmt(sketch_quantile(cur, 0.5, low, high, discrete)),
+                "Window p95": fmt(sketch_quantile(cur, 0.95, low, high, discrete)),
+                "Reference p50": fmt(sketch_quantile(ref, 0.5, low, high, discrete)),
+                "Reference p95": fmt(sketch_quantile(ref, 0.95, low, high, discrete)),
+                "PSI": fmt(psi),
+                "Status": status,
+            })
+        st.dataframe(pd.DataFrame(rows), use_container_width=True)
+        st.caption("PSI below 0.1 is stable, 0.1-0.25 is moderate drift, above 0.25 is significant drift.")
+
+        if reference:
+            st.subheader("PSI per Window")
+            psi_history = pd.DataFrame(
+                {
+                    name: [
+                        population_stability_index(
+                            reference.get(name, new_sketch()), history.get(w, {}).get(name, new_sketch())
+                        )
+                        for w in sorted(history)
+                    ]
+                    for name, _, _ in DRIFT_FEATURES[model]
+                },
+                index=sorted(history),
+            )
+            st.line_chart(psi_history)
+
+    # Admin Analytics Page
+    elif selected == "Admin Analytics" and is_admin():
+        st.title("Usage Analytics")
+
+        days = st.selectbox("Period", [7, 30, 90, 365], format_func=lambda d: f"Last {d} days")
+        if st.button("Rebuild Rollups from Event Log"):
+            rebuild_rollups()
+            st.success("Rollups rebuilt.")
+
+        rollups = load_rollups(days)
+        totals = rollups.groupby("event")["count"].sum()
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Signups", int(totals.get("signup", 0)))
+        col2.metric("Logins", int(totals.get("login", 0)))
+        col3.metric("Predictions", int(totals.get("prediction", 0)))
+
+        st.subheader("Daily Activity")
+        daily = rollups.pivot_table(index="day", columns="event", values="count", aggfunc="sum", fill_value=0)
+        if daily.empty:
+            st.info("No activity recorded in this period.")
+        else:
+            st.line_chart(daily)
+
+        st.subheader("Predictions per Disease")
+        predictions = rollups[rollups["event"] == "prediction"]
+        if predictions.empty:
+            st.info("No predictions recorded in this period.")
+        else:
+            per_disease = predictions.groupby("disease")[["count", "positives"]].sum()
+            per_disease["Positive Rate (%)"] = (per_disease["positives"] / per_disease["count"] * 100).round(1)
+            per_disease = per_disease.rename(columns={"count": "Predictions", "positives": "Positive"})
+            st.dataframe(per_disease, use_container_width=True)
+
+            st.subheader("Daily Positive Rate per Disease")
+            daily_rate = predictions.pivot_table(index="day", columns="disease", values=["count", "positives"], aggfunc="sum")
+            st.line_chart((daily_rate["positives"] / daily_rate["count"] * 100).round(1))